@@ -0,0 +1,234 @@
+"""Offline encyclopedia pack for Echo's "tell me about" queries.
+
+A pack is a directory holding:
+
+- articles.bin: each article's title and lead paragraph, zlib-compressed
+  independently so any one can be read without touching the rest
+- titles.dat: the normalized titles and redirects, concatenated as UTF-8
+- titles.idx: fixed-size records sorted by title bytes, each pointing at a
+  title in titles.dat and an article in articles.bin
+- meta.json: format version and counts
+
+The reader memory-maps all three data files and binary-searches the index,
+so only the touched pages become resident however large the pack is.
+
+Build a pack from JSON lines of {"title", "text", "redirects"}:
+    python knowledge_pack.py build articles.jsonl ~/.echo/knowledge
+"""
+import argparse
+import difflib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import zlib
+
+PACK_VERSION = 1
+RECORD = struct.Struct("<QIQI")  # title offset, title length, article offset, article length
+NEIGHBOUR_WINDOW = 16
+FUZZY_CUTOFF = 0.85
+MIN_FALLBACK_LENGTH = 4
+LEADING_ARTICLES = re.compile(r"^(?:the|a|an)\s+")
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase a title and strip punctuation and leading articles."""
+    title = re.sub(r"[^\w\s]", " ", title.lower())
+    return LEADING_ARTICLES.sub("", " ".join(title.split()))
+
+
+def first_sentences(text: str, count: int = 2) -> str:
+    """Return the first count sentences of text."""
+    sentences = re.split(r"(?<=[.!?])\s+", text.strip())
+    return " ".join(sentences[:count])
+
+
+def _plural_variants(title: str) -> list:
+    """Return the singular or plural spellings worth trying for a normalized title."""
+    if title.endswith("ies"):
+        return [f"{title[:-3]}y", title[:-1]]
+    if title.endswith("es"):
+        return [title[:-2], title[:-1]]
+    if title.endswith("s"):
+        return [title[:-1]]
+    if title.endswith("y"):
+        return [f"{title[:-1]}ies", f"{title}s"]
+    return [f"{title}s", f"{title}es"]
+
+
+class KnowledgePack:
+    """Read-only, memory-mapped view of a knowledge pack directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != PACK_VERSION:
+            raise ValueError(f"Unsupported knowledge pack version {self.meta.get('version')}")
+        self._files = []
+        self._index = self._map("titles.idx")
+        self._titles = self._map("titles.dat")
+        self._articles = self._map("articles.bin")
+        self.count = len(self._index) // RECORD.size
+
+    def _map(self, name: str) -> mmap.mmap:
+        """Memory-map one pack file read-only."""
+        f = open(os.path.join(self.directory, name), "rb")
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """Unmap the pack files."""
+        for mapped in (self._index, self._titles, self._articles):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        for f in self._files:
+            f.close()
+
+    def _record(self, i: int) -> tuple:
+        return RECORD.unpack_from(self._index, i * RECORD.size)
+
+    def _title(self, i: int) -> bytes:
+        title_offset, title_length, _, _ = self._record(i)
+        return self._titles[title_offset:title_offset + title_length]
+
+    def _bisect(self, key: bytes) -> int:
+        """Return the first index whose title is >= key."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._title(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _article(self, i: int) -> tuple:
+        """Return (title, text) for the article that index record i points at."""
+        _, _, article_offset, article_length = self._record(i)
+        data = zlib.decompress(self._articles[article_offset:article_offset + article_length])
+        title, _, text = data.decode("utf-8").partition("\n")
+        return title, text
+
+    def find(self, query: str):
+        """Return the index record best matching query, or None."""
+        normalized = normalize_title(query)
+        if not normalized or not self.count:
+            return None
+        for candidate in [normalized] + _plural_variants(normalized):
+            key = candidate.encode("utf-8")
+            i = self._bisect(key)
+            if i < self.count and self._title(i) == key:
+                return i
+
+        # Short queries match too many titles by prefix or spelling; only accept them exactly
+        if len(normalized) < MIN_FALLBACK_LENGTH:
+            return None
+
+        # Nothing exact: prefer the shortest title that extends the query by whole words,
+        # then a close spelling
+        key = normalized.encode("utf-8")
+        start = self._bisect(key)
+        prefixed = [i for i in range(start, min(self.count, start + NEIGHBOUR_WINDOW))
+                    if self._title(i).startswith(key + b" ")]
+        if prefixed:
+            return min(prefixed, key=lambda i: len(self._title(i)))
+        best, best_ratio = None, FUZZY_CUTOFF
+        for i in range(max(0, start - NEIGHBOUR_WINDOW), min(self.count, start + NEIGHBOUR_WINDOW)):
+            ratio = difflib.SequenceMatcher(None, normalized, self._title(i).decode("utf-8")).ratio()
+            if ratio > best_ratio:
+                best, best_ratio = i, ratio
+        return best
+
+    def lookup(self, query: str, sentences: int = 2):
+        """Return the first sentences of the best matching article, or None."""
+        i = self.find(query)
+        if i is None:
+            return None
+        _, text = self._article(i)
+        return first_sentences(text, sentences)
+
+
+def open_knowledge_pack(directory: str):
+    """Open the pack in directory, or return None if there is no usable pack."""
+    try:
+        return KnowledgePack(directory)
+    except (OSError, ValueError):
+        return None
+
+
+def build_knowledge_pack(source_path: str, directory: str) -> dict:
+    """Build a pack from a JSON lines file of articles with optional redirects."""
+    os.makedirs(directory, exist_ok=True)
+    entries = []
+    articles = 0
+    offset = 0
+    with open(source_path, encoding="utf-8") as source, \
+            open(os.path.join(directory, "articles.bin"), "wb") as out:
+        for line in source:
+            if not line.strip():
+                continue
+            article = json.loads(line)
+            title, text = article["title"].strip(), " ".join(article["text"].split())
+            if not title or not text:
+                continue
+            blob = zlib.compress(f"{title}\n{text}".encode("utf-8"), 9)
+            out.write(blob)
+            for name in [title] + article.get("redirects", []):
+                normalized = normalize_title(name)
+                if normalized:
+                    entries.append((normalized.encode("utf-8"), offset, len(blob)))
+            offset += len(blob)
+            articles += 1
+
+    # Sort titles byte-wise; on duplicates the first article keeps the title
+    entries.sort(key=lambda entry: entry[0])
+    titles_written = 0
+    title_offset = 0
+    previous = None
+    with open(os.path.join(directory, "titles.dat"), "wb") as titles, \
+            open(os.path.join(directory, "titles.idx"), "wb") as index:
+        for title, article_offset, article_length in entries:
+            if title == previous:
+                continue
+            previous = title
+            titles.write(title)
+            index.write(RECORD.pack(title_offset, len(title), article_offset, article_length))
+            title_offset += len(title)
+            titles_written += 1
+
+    meta = {"version": PACK_VERSION, "articles": articles, "titles": titles_written}
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query an Echo knowledge pack.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a pack from JSON lines")
+    build.add_argument("source")
+    build.add_argument("directory")
+    query = commands.add_parser("query", help="look up a title in a pack")
+    query.add_argument("directory")
+    query.add_argument("title")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        meta = build_knowledge_pack(args.source, args.directory)
+        print(f"Packed {meta['articles']} articles under {meta['titles']} titles into {args.directory}")
+        return 0
+    pack = open_knowledge_pack(args.directory)
+    if pack is None:
+        print(f"No knowledge pack in {args.directory}")
+        return 1
+    print(pack.lookup(args.title) or f"No article found for {args.title}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,412 @@
+"""Replay recorded Echo sessions through the command pipeline at load.
+
+Recordings come from running Echo with ECHO_RECORD_DIR set. Each turn is
+fed through audio preprocessing, recognition, command handling and speech
+synthesis with every cloud dependency replaced by a local stand-in:
+
+- DuckDuckGo is served by a local HTTP server
+- Gemini, Wikipedia, speech recognition and edge-tts are in-process fakes
+
+Each stand-in has a configurable latency and error profile, so the run
+works offline and reports end-to-end latency and throughput. A turn counts
+as failed when any stand-in fails during it, even if Echo answered with a
+fallback. Application launches, the app index and reminders are stubbed
+too, so a replay leaves the desktop and ~/.echo untouched.
+
+Usage:
+    python loadtest.py RECORDING_DIR --concurrency 8 --iterations 5 \\
+        --latency gemini=0.8 --latency wikipedia=0.3 --error-rate gemini=0.05
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import contextvars
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import wave
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import main
+import speech_recognition as sr
+
+# Default (latency seconds, error rate) for each stand-in
+DEFAULT_PROFILES = {
+    "stt": (0.35, 0.0),
+    "gemini": (0.9, 0.0),
+    "duckduckgo": (0.25, 0.0),
+    "wikipedia": (0.3, 0.0),
+    "tts": (0.4, 0.0),
+}
+STAGES = ("preprocess", "recognize", "process", "synthesize")
+# Stand-ins that failed during the turn running in the current context
+turn_failures = contextvars.ContextVar("turn_failures", default=None)
+
+
+class LatencyProfile:
+    """Latency and error behaviour of one fake service."""
+
+    def __init__(self, name: str, latency: float, error_rate: float, jitter: float, rng: random.Random):
+        self.name = name
+        self.latency = latency
+        self.error_rate = error_rate
+        self.jitter = jitter
+        self.rng = rng
+        self.calls = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def sample(self) -> tuple:
+        """Return the delay for one call and whether it should fail."""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+            failed = self.rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if failed:
+            note_failure(self.name)
+        return max(0.0, delay), failed
+
+
+def note_failure(service: str):
+    """Charge a stand-in failure to the turn running in the current context."""
+    failures = turn_failures.get()
+    if failures is not None:
+        failures.append(service)
+
+
+class ContextExecutor(concurrent.futures.ThreadPoolExecutor):
+    """Thread pool that runs each call in its caller's context, like asyncio.to_thread."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class FakeServiceError(Exception):
+    """Raised by a stand-in when its error profile triggers."""
+
+
+class FakeGenerativeModel:
+    """Stand-in for genai.GenerativeModel."""
+
+    profile = None
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    @staticmethod
+    def _respond(prompt: str, failed: bool):
+        if failed:
+            raise FakeServiceError("injected Gemini failure")
+        user_prompt = prompt.rsplit("User: ", 1)[-1]
+        return type("Response", (), {"text": f"Here is a local answer about {user_prompt}."})()
+
+    async def generate_content_async(self, prompt: str):
+        delay, failed = self.profile.sample()
+        await asyncio.sleep(delay)
+        return self._respond(prompt, failed)
+
+    def generate_content(self, prompt: str):
+        delay, failed = self.profile.sample()
+        time.sleep(delay)
+        return self._respond(prompt, failed)
+
+
+class FakeReminderScheduler:
+    """Stand-in for main.reminder_scheduler that never fires."""
+
+    def __init__(self):
+        self.scheduled = 0
+
+    def schedule(self, delay: float, message: str) -> float:
+        self.scheduled += 1
+        return time.time() + delay
+
+    def cancel_all(self) -> int:
+        return 0
+
+    def pending(self) -> int:
+        return 0
+
+
+class FakeGenai:
+    """Stand-in for the google.generativeai module."""
+
+    GenerativeModel = FakeGenerativeModel
+
+
+class FakeCommunicate:
+    """Stand-in for edge_tts.Communicate that writes silent MP3-sized output."""
+
+    profile = None
+
+    def __init__(self, text: str, voice: str = None, rate: str = None):
+        self.text = text
+
+    async def save(self, path: str):
+        delay, failed = self.profile.sample()
+        await asyncio.sleep(delay)
+        if failed:
+            raise FakeServiceError("injected TTS failure")
+        # Roughly one second of 48 kbps audio per 15 characters
+        with open(path, "wb") as f:
+            f.write(bytes(max(1, len(self.text) * main.TTS_BITRATE // 8 // 15)))
+
+
+def make_fake_wikipedia_summary(profile: LatencyProfile):
+    """Build a stand-in for wikipedia.summary."""
+
+    def summary(subject: str, sentences: int = 2):
+        delay, failed = profile.sample()
+        time.sleep(delay)
+        if failed:
+            raise main.wikipedia.exceptions.PageError(subject)
+        return f"{subject.title()} is a topic described in the local test encyclopedia."
+
+    return summary
+
+
+def start_duckduckgo_server(profile: LatencyProfile) -> ThreadingHTTPServer:
+    """Serve DuckDuckGo-shaped JSON answers on a local port."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            delay, failed = profile.sample()
+            time.sleep(delay)
+            if failed:
+                self.send_response(500)
+                self.end_headers()
+                return
+            query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+            body = json.dumps({"AbstractText": f"Local search result for {query}.", "RelatedTopics": []})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body.encode())
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def install_fakes(profiles: dict) -> ThreadingHTTPServer:
+    """Point Echo's cloud dependencies and side effects at local stand-ins."""
+    FakeGenerativeModel.profile = profiles["gemini"]
+    FakeCommunicate.profile = profiles["tts"]
+    main.genai = FakeGenai
+    main.GEMINI_AVAILABLE = True
+    main.edge_tts = type("FakeEdgeTTS", (), {"Communicate": FakeCommunicate})
+    main.TTS_AVAILABLE = True
+    main.wikipedia.summary = make_fake_wikipedia_summary(profiles["wikipedia"])
+    server = start_duckduckgo_server(profiles["duckduckgo"])
+    main.DUCKDUCKGO_API_URL = f"http://127.0.0.1:{server.server_address[1]}/"
+    track_duckduckgo_failures()
+
+    # Keep the replay from touching the desktop
+    main.webbrowser.open = lambda *args, **kwargs: True
+    main.pywhatkit = type("FakePywhatkit", (), {"playonyt": staticmethod(lambda *args, **kwargs: None)})
+    main.YOUTUBE_PLAYBACK_AVAILABLE = True
+    main.launch_application = lambda *args, **kwargs: None
+    main.subprocess.Popen = lambda *args, **kwargs: None
+    index_dir = tempfile.mkdtemp(prefix="echo-loadtest-")
+    main.app_catalog = main.AppCatalog(os.path.join(index_dir, "app_index.json"),
+                                       os.path.join(index_dir, "app_aliases.json"))
+    main.reminder_scheduler = FakeReminderScheduler()
+    main.set_volume = lambda level: True
+    main.set_brightness = lambda level: True
+    main.close_application = lambda app_name: False
+    return server
+
+
+def track_duckduckgo_failures():
+    """Charge failed DuckDuckGo requests to their turn.
+
+    The local server fails requests on its own threads, so the failure is
+    noticed on the client side: a healthy stand-in always returns an answer.
+    """
+    search = main.duckduckgo_search_async
+
+    async def tracked(query: str):
+        result = await search(query)
+        if result is None:
+            note_failure("duckduckgo")
+        return result
+
+    main.duckduckgo_search_async = tracked
+
+
+def load_recording(directory: str) -> list:
+    """Load the turns of a recorded session with their audio."""
+    turns = []
+    with open(os.path.join(directory, "session.jsonl"), encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            turn = json.loads(line)
+            with wave.open(os.path.join(directory, turn["audio"]), "rb") as wav:
+                frames = wav.readframes(wav.getnframes())
+                turn["audio_data"] = sr.AudioData(frames, wav.getframerate(), wav.getsampwidth())
+            turns.append(turn)
+    return turns
+
+
+async def replay_turn(worker, turn: dict, profiles: dict) -> dict:
+    """Run one recorded turn through the pipeline and time each stage."""
+    timings = {}
+    failures = []
+    turn_failures.set(failures)
+    started = time.perf_counter()
+    audio, _ = await main.run_blocking(main.preprocess_audio, turn["audio_data"])
+    timings["preprocess"] = time.perf_counter() - started
+
+    stage_start = time.perf_counter()
+    delay, failed = profiles["stt"].sample()
+    await asyncio.sleep(delay)
+    timings["recognize"] = time.perf_counter() - stage_start
+    if failed:
+        return {"ok": False, "errors": failures, "timings": timings, "total": time.perf_counter() - started}
+
+    stage_start = time.perf_counter()
+    response = await worker.process_compound_command(turn["transcript"])
+    timings["process"] = time.perf_counter() - stage_start
+
+    stage_start = time.perf_counter()
+    try:
+        await main.edge_tts.Communicate(main.filter_text(response)).save(os.devnull)
+    except FakeServiceError:
+        pass
+    timings["synthesize"] = time.perf_counter() - stage_start
+    return {"ok": not failures, "errors": failures, "timings": timings, "total": time.perf_counter() - started}
+
+
+async def run_load(turns: list, profiles: dict, concurrency: int, iterations: int) -> tuple:
+    """Replay every turn the given number of times with bounded concurrency."""
+    worker = main.VoiceWorker()
+    # VoiceWorker trains the classifier at startup, before the first turn
+    main.load_intent_classifier()
+    semaphore = asyncio.Semaphore(concurrency)
+    asyncio.get_running_loop().set_default_executor(
+        ContextExecutor(max_workers=max(8, concurrency * 2))
+    )
+
+    async def bounded(turn):
+        async with semaphore:
+            return await replay_turn(worker, turn, profiles)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(bounded(turn) for _ in range(iterations) for turn in turns))
+    return results, time.perf_counter() - started
+
+
+def percentile(values: list, pct: float) -> float:
+    """Return the pct-th percentile of values using nearest rank."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def build_report(results: list, wall_seconds: float, profiles: dict, concurrency: int) -> dict:
+    """Summarize latency percentiles, throughput and error counts."""
+    totals = [r["total"] for r in results]
+    report = {
+        "turns": len(results),
+        "concurrency": concurrency,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_per_second": round(len(results) / wall_seconds, 2) if wall_seconds else 0.0,
+        "failed_turns": sum(1 for r in results if not r["ok"]),
+        "failed_turns_by_service": dict(Counter(service for r in results for service in set(r["errors"]))),
+        "latency": {},
+        "services": {
+            name: {"calls": p.calls, "errors": p.errors, "latency": p.latency, "error_rate": p.error_rate}
+            for name, p in profiles.items()
+        },
+    }
+    for stage in STAGES + ("total",):
+        values = totals if stage == "total" else [r["timings"][stage] for r in results if stage in r["timings"]]
+        report["latency"][stage] = {
+            "mean": round(statistics.fmean(values), 4) if values else 0.0,
+            "p50": round(percentile(values, 50), 4),
+            "p90": round(percentile(values, 90), 4),
+            "p99": round(percentile(values, 99), 4),
+            "max": round(max(values), 4) if values else 0.0,
+        }
+    return report
+
+
+def print_report(report: dict):
+    """Print the report as a compact table."""
+    print(f"Turns: {report['turns']}  concurrency: {report['concurrency']}  "
+          f"wall: {report['wall_seconds']}s  throughput: {report['throughput_per_second']} turns/s  "
+          f"failed: {report['failed_turns']}")
+    failed_by_service = report["failed_turns_by_service"]
+    print(f"{'stage':<12}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    for stage, stats in report["latency"].items():
+        print(f"{stage:<12}" + "".join(f"{stats[key]:>9.3f}" for key in ("mean", "p50", "p90", "p99", "max")))
+    for name, service in report["services"].items():
+        print(f"{name:<12}calls={service['calls']} errors={service['errors']} "
+              f"failed_turns={failed_by_service.get(name, 0)}")
+
+
+def parse_overrides(values: list, option: str) -> dict:
+    """Parse repeated service=value options."""
+    overrides = {}
+    for value in values or []:
+        name, _, number = value.partition("=")
+        if name not in DEFAULT_PROFILES or not number:
+            raise SystemExit(f"{option} expects one of {', '.join(DEFAULT_PROFILES)} as service=value")
+        overrides[name] = float(number)
+    return overrides
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded Echo sessions against local fake services.")
+    parser.add_argument("recording", help="directory written with ECHO_RECORD_DIR")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=1, help="times to replay the whole recording")
+    parser.add_argument("--latency", action="append", help="service=seconds, e.g. gemini=0.8")
+    parser.add_argument("--error-rate", action="append", help="service=fraction, e.g. wikipedia=0.1")
+    parser.add_argument("--jitter", type=float, default=0.2, help="relative latency jitter")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", help="write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    latencies = parse_overrides(args.latency, "--latency")
+    error_rates = parse_overrides(args.error_rate, "--error-rate")
+    rng = random.Random(args.seed)
+    profiles = {
+        name: LatencyProfile(name, latencies.get(name, latency), error_rates.get(name, error_rate), args.jitter, rng)
+        for name, (latency, error_rate) in DEFAULT_PROFILES.items()
+    }
+
+    turns = load_recording(args.recording)
+    if not turns:
+        raise SystemExit(f"No turns recorded in {args.recording}")
+    server = install_fakes(profiles)
+    try:
+        results, wall_seconds = asyncio.run(run_load(turns, profiles, args.concurrency, args.iterations))
+    finally:
+        server.shutdown()
+
+    report = build_report(results, wall_seconds, profiles, args.concurrency)
+    print_report(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
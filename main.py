@@ -5,10 +5,20 @@ import time
 import re
 import asyncio
 import datetime
+import decimal
+import functools
+import json
+import logging
+import shlex
+import bisect
+import ast
+import heapq
+import math
+import operator
+import weakref
+from collections import Counter
 
-import wmi
 import speech_recognition as sr
-import pywhatkit
 import wikipedia
 import webbrowser
 import subprocess
@@ -21,7 +31,10 @@ from PyQt6.QtWidgets import (
     QStackedWidget, QScrollArea
 )
 from PyQt6.QtGui import QFont
-from PyQt6.QtCore import Qt, pyqtSignal, QThread, QTimer
+from PyQt6.QtCore import Qt, pyqtSignal, QObject, QThread, QTimer
+
+from knowledge_pack import open_knowledge_pack
+from memory_diagnostics import MemoryDiagnostics
 
 # Optional module imports with availability flags
 try:
@@ -44,6 +57,21 @@ try:
 except ImportError:
     GEMINI_AVAILABLE = False
 
+try:
+    import pywhatkit
+
+    YOUTUBE_PLAYBACK_AVAILABLE = True
+except Exception:
+    # pywhatkit imports pyautogui, which fails outright without a display
+    YOUTUBE_PLAYBACK_AVAILABLE = False
+
+try:
+    import wmi
+
+    BRIGHTNESS_CONTROL_AVAILABLE = True
+except ImportError:
+    BRIGHTNESS_CONTROL_AVAILABLE = False
+
 try:
     from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
     from comtypes import CLSCTX_ALL
@@ -52,6 +80,27 @@ try:
 except ImportError:
     VOLUME_CONTROL_AVAILABLE = False
 
+try:
+    import aiohttp
+
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from intent_classifier import IntentClassifier
+
+    INTENT_CLASSIFIER_AVAILABLE = True
+except ImportError:
+    INTENT_CLASSIFIER_AVAILABLE = False
+
 # Constants
 MEMORY_LIMIT = 5
 APP_PATHS = {
@@ -68,13 +117,144 @@ INTENT_CATEGORIES = {
     "weather": ["weather", "temperature", "forecast"],
     "ai_chat": ["general conversation"]
 }
+INTENT_TRAINING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intents.tsv")
+INTENT_CONFIDENCE_THRESHOLD = 0.4
+COMMAND_STARTERS = (
+    "play", "open", "close", "launch", "start", "set", "increase", "decrease", "turn",
+    "volume", "brightness", "what", "whats", "when", "who is", "tell me", "explain",
+    "search", "look up", "weather", "time", "date", "today", "remind", "convert",
+    "calculate", "compute", "how much", "how many", "cancel",
+)
+# A comma between two digits is a thousands separator, not a break between commands
+CONJUNCTION_PATTERN = re.compile(
+    r"\s*(?:,\s*)?\b(and then|then|after that|afterwards|and|also|plus)\b\s*|\s*(?:(?<!\d),|,(?!\d))\s*"
+)
+SEQUENCE_WORDS = {"and then", "then", "after that", "afterwards"}
+OPEN_PATTERN = re.compile(r"\b(?:open|launch|start)\s+(?:the\s+)?(.+)")
+CLOSE_PATTERN = re.compile(r"\b(?:close|quit|exit)\s+(?:the\s+)?(.+)")
+TIME_QUESTION = re.compile(r"\b(?:what time|the time|current time|and time|time (?:is it|now|please)|how late|o'?clock)\b|^time\b")
+DATE_QUESTION = re.compile(r"\b(?:date|what day|which day|day is it|day today|today|what month|what year|is it (?:monday|tuesday|wednesday|thursday|friday|saturday|sunday))\b")
+ECHO_DATA_DIR = os.path.join(os.path.expanduser("~"), ".echo")
+APP_INDEX_PATH = os.path.join(ECHO_DATA_DIR, "app_index.json")
+APP_ALIASES_PATH = os.path.join(ECHO_DATA_DIR, "app_aliases.json")
+APP_INDEX_REFRESH_INTERVAL = 30
+KNOWLEDGE_PACK_DIR = os.environ.get("ECHO_KNOWLEDGE_PACK", os.path.join(ECHO_DATA_DIR, "knowledge"))
+APP_MATCH_THRESHOLD = 0.45
+APP_INDEX_VERSION = 2
+# Never launched by voice, whatever source names them
+APP_DENYLIST = {
+    "shutdown", "poweroff", "reboot", "halt", "restart", "logout", "suspend", "hibernate",
+    "init", "telinit", "systemctl", "kill", "killall", "pkill", "xkill", "rm", "rmdir", "dd",
+    "mkfs", "fdisk", "sfdisk", "parted", "wipefs", "shred", "format", "diskpart", "sudo", "su",
+    "doas", "pkexec", "chmod", "chown", "mv",
+}
+DESKTOP_FIELD_CODES = re.compile(r"%[fFuUdDnNickvm]")
+RECORD_DIR = os.environ.get("ECHO_RECORD_DIR")
+MEMORY_REPORT_PATH = os.environ.get("ECHO_MEMORY_REPORT")
+DUCKDUCKGO_API_URL = "http://api.duckduckgo.com/"
+IDLE_RELEASE_DELAY = 30
+TTS_BITRATE = 48000
+TARGET_SAMPLE_RATE = 16000
+SILENCE_THRESHOLD = 0.01
+SILENCE_PADDING = 0.2
+SILENCE_FRAME = 0.02
+ANTI_ALIAS_TAPS = 101
+
+ARITHMETIC_PREFIX = re.compile(r"^(?:what is|what's|whats|calculate|compute|how much is)\s+(?:the\s+)?(.+?)\??$")
+ARITHMETIC_WORDS = [
+    (r"(\d+(?:\.\d+)?)\s*(?:percent|%)\s+of\b", r"(\1/100)*"),
+    (r"\bsquare root of\s+(\d+(?:\.\d+)?)", r"sqrt(\1)"),
+    (r"\bsquared\b", "**2"),
+    (r"\bcubed\b", "**3"),
+    (r"\bto the power of\b", "**"),
+    (r"\bmultiplied by\b|\btimes\b|\bx\b", "*"),
+    (r"\bdivided by\b|\bover\b", "/"),
+    (r"\bplus\b", "+"),
+    (r"\bminus\b", "-"),
+    (r"\bmod(?:ulo)?\b", "%"),
+    (r"\bpercent\b|%", "/100"),
+]
+ARITHMETIC_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+MAX_EXPONENT = 1000
+MAX_RESULT_BITS = 10000
+UNIT_PATTERN = re.compile(
+    r"^(?:convert\s+|what is\s+|what's\s+|whats\s+|how much is\s+)?"
+    r"(-?\d+(?:,\d{3})*(?:\.\d+)?)\s*([a-z° ]+?)\s+(?:to|in|into)\s+([a-z° ]+?)\??$"
+)
+HOW_MANY_PATTERN = re.compile(
+    r"^how many\s+([a-z° ]+?)\s+(?:are\s+|is\s+)?(?:there\s+)?in\s+(?:an?\s+|one\s+)?(-?\d+(?:,\d{3})*(?:\.\d+)?)?\s*([a-z° ]+?)\??$"
+)
+# unit alias -> (dimension, factor to the dimension's base unit)
+UNIT_DEFINITIONS = [
+    ("length", 1.0, "m|meter|meters|metre|metres"),
+    ("length", 1000.0, "km|kilometer|kilometers|kilometre|kilometres"),
+    ("length", 0.01, "cm|centimeter|centimeters|centimetre|centimetres"),
+    ("length", 0.001, "mm|millimeter|millimeters|millimetre|millimetres"),
+    ("length", 1609.344, "mi|mile|miles"),
+    ("length", 0.9144, "yd|yard|yards"),
+    ("length", 0.3048, "ft|foot|feet"),
+    ("length", 0.0254, "in|inch|inches"),
+    ("mass", 1.0, "kg|kilo|kilos|kilogram|kilograms"),
+    ("mass", 0.001, "g|gram|grams"),
+    ("mass", 0.45359237, "lb|lbs|pound|pounds"),
+    ("mass", 0.028349523125, "oz|ounce|ounces"),
+    ("mass", 1000.0, "tonne|tonnes|ton|tons"),
+    ("volume", 1.0, "l|liter|liters|litre|litres"),
+    ("volume", 0.001, "ml|milliliter|milliliters|millilitre|millilitres"),
+    ("volume", 3.785411784, "gal|gallon|gallons"),
+    ("volume", 0.2365882365, "cup|cups"),
+    ("volume", 0.0295735295625, "fluid ounce|fluid ounces"),
+    ("time", 1.0, "s|sec|secs|second|seconds"),
+    ("time", 60.0, "min|mins|minute|minutes"),
+    ("time", 3600.0, "h|hr|hrs|hour|hours"),
+    ("time", 86400.0, "day|days"),
+    ("time", 604800.0, "week|weeks"),
+    ("speed", 1.0, "meters per second|metres per second"),
+    ("speed", 1 / 3.6, "kph|kmh|kilometers per hour|kilometres per hour"),
+    ("speed", 0.44704, "mph|miles per hour"),
+    ("data", 1.0, "byte|bytes"),
+    ("data", 1024.0, "kb|kilobyte|kilobytes"),
+    ("data", 1024.0 ** 2, "mb|megabyte|megabytes"),
+    ("data", 1024.0 ** 3, "gb|gigabyte|gigabytes"),
+    ("data", 1024.0 ** 4, "tb|terabyte|terabytes"),
+]
+UNITS = {
+    alias: (dimension, factor)
+    for dimension, factor, aliases in UNIT_DEFINITIONS
+    for alias in aliases.split("|")
+}
+TEMPERATURE_UNITS = {
+    "c": "c", "celsius": "c", "degrees celsius": "c", "°c": "c", "centigrade": "c",
+    "f": "f", "fahrenheit": "f", "degrees fahrenheit": "f", "°f": "f",
+    "k": "k", "kelvin": "k", "kelvins": "k",
+}
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?|an?|one)\s*(seconds?|secs?|minutes?|mins?|hours?|hrs?)\b")
+DURATION_SECONDS = {"s": 1, "m": 60, "h": 3600}
+CLOCK_PATTERN = re.compile(r"\bat\s+(\d{1,2})(?::(\d{2}))?\s*(a\.?m\.?|p\.?m\.?)?(?=\s|$)")
+REMINDER_PATTERN = re.compile(r"^remind me (?:to\s+)?(.*)$")
 
 # Global variables
-pygame.mixer.init()
+logger = logging.getLogger("echo")
 loop = asyncio.new_event_loop()
 context_memory = []
 is_speaking = False
 interrupt_flag = threading.Event()
+speech_lock = None
+speech_generation = 0
+mixer_lock = threading.Lock()
+wakeup_counters = Counter()
+knowledge_pack = open_knowledge_pack(KNOWLEDGE_PACK_DIR)
+intent_classifier = None
+intent_classifier_lock = threading.Lock()
 
 
 def run_asyncio_loop():
@@ -86,6 +266,27 @@ def run_asyncio_loop():
 threading.Thread(target=run_asyncio_loop, daemon=True).start()
 
 
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call in the default executor of the shared loop."""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+def ensure_mixer():
+    """Initialize the pygame mixer if it was released while idle."""
+    with mixer_lock:
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+            wakeup_counters["mixer_restores"] += 1
+
+
+def release_mixer():
+    """Shut down the pygame mixer so the audio output device can sleep."""
+    with mixer_lock:
+        if pygame.mixer.get_init() and not is_speaking:
+            pygame.mixer.quit()
+            wakeup_counters["mixer_releases"] += 1
+
+
 def filter_text(text: str) -> str:
     """Clean text for TTS by removing markdown and special characters."""
     text = re.sub(r'\*\*.*?\*\*|\*.*?\*|`.*?`', lambda m: m.group(0)[1:-1], text)
@@ -94,39 +295,103 @@ def filter_text(text: str) -> str:
     return ' '.join(text.split())
 
 
+def interrupt_speech():
+    """Stop the current clip and drop every clip still waiting to play."""
+    global speech_generation
+    speech_generation += 1
+    interrupt_flag.set()
+
+
 async def text_to_speech(text: str, callback=None) -> None:
-    """Convert text to speech using edge-tts."""
-    global is_speaking
+    """Convert text to speech using edge-tts.
+
+    Synthesis starts immediately, but playback is serialized on speech_lock
+    so concurrent responses are spoken one after another in call order.
+    """
+    global is_speaking, speech_lock
     if not TTS_AVAILABLE:
         if callback:
             callback(f"TTS: {text}")
         return
 
+    if speech_lock is None:
+        speech_lock = asyncio.Lock()
+    generation = speech_generation
+    audio_file = None
+    synthesis = None
     try:
         clean_text = filter_text(text)
         voice = "en-US-JennyNeural"
         tts = edge_tts.Communicate(clean_text, voice, rate="+15%")
-        audio_file = f"response_{int(time.time())}.mp3"
-        await tts.save(audio_file)
-        is_speaking = True
-        interrupt_flag.clear()
+        audio_file = f"response_{time.time_ns()}.mp3"
+        synthesis = asyncio.ensure_future(tts.save(audio_file))
+        async with speech_lock:
+            await synthesis
+            if generation != speech_generation:
+                return
+            await _play_clip(audio_file, callback)
+    except Exception as e:
+        if callback:
+            callback(f"TTS Error: {text}")
+    finally:
+        if synthesis and not synthesis.done():
+            synthesis.cancel()
+        if audio_file:
+            try:
+                os.remove(audio_file)
+            except OSError:
+                pass
+
+
+async def _play_clip(audio_file: str, callback=None) -> None:
+    """Play one synthesized clip, returning when it ends or is interrupted."""
+    global is_speaking
+    is_speaking = True
+    interrupt_flag.clear()
+    try:
         if callback:
             callback(" ")
+        ensure_mixer()
         pygame.mixer.music.load(audio_file)
         pygame.mixer.music.play()
-        while pygame.mixer.music.get_busy():
-            if interrupt_flag.is_set():
-                pygame.mixer.music.stop()
-                break
-            await asyncio.sleep(0.1)
+        # Block on the interrupt flag for the clip's length instead of polling the mixer
+        duration = os.path.getsize(audio_file) * 8 / TTS_BITRATE
+        interrupted = await run_blocking(interrupt_flag.wait, duration)
+        wakeup_counters["playback_wakeups"] += 1
+        while not interrupted and pygame.mixer.music.get_busy():
+            interrupted = await run_blocking(interrupt_flag.wait, 0.25)
+            wakeup_counters["playback_wakeups"] += 1
+        if interrupted:
+            pygame.mixer.music.stop()
+        pygame.mixer.music.unload()
+    finally:
         is_speaking = False
-        try:
-            os.remove(audio_file)
-        except:
-            pass
-    except Exception as e:
-        if callback:
-            callback(f"TTS Error: {text}")
+
+
+def _build_gemini_prompt(prompt: str) -> str:
+    """Combine the system prompt, recent context and the user's prompt."""
+    system_prompt = """
+        You are an advanced, context-aware AI assistant named Echo, designed to deliver precise, insightful, and efficient responses. Your primary goal is to provide clear, intelligent, and engaging answers while maintaining brevity and relevance. Follow these principles:
+        - Adapt to Context & Mood: Align your tone with the user's mood and the nature of the conversation—whether casual, professional, or highly technical.
+        - Be Concise, Yet Complete: Deliver well-structured responses that are neither too short nor unnecessarily verbose. Prioritize clarity and depth without over-explaining.
+        - No Redundancy: Avoid repeating information or your name ("Echo") unless necessary for clarity or emphasis.
+        - Ask Smart Questions: If a query lacks clarity, request precise details with a brief, targeted question.
+        - Ensure Logical Flow: Keep responses interconnected, ensuring a seamless and engaging dialogue.
+        - Encourage Exploration: When relevant, subtly suggest related ideas or next steps to enhance the user's understanding.
+        - Prioritize Accuracy & Relevance: Always provide well-reasoned, factual, and contextually appropriate responses.
+        Your mission: Deliver an exceptional user experience with every interaction. Avoid starting responses with "Echo" or self-referential phrases unless explicitly asked about your identity.
+    """
+    memory_context = "\n".join(context_memory)
+    return f"{system_prompt}\n{memory_context}\nUser: {prompt}"
+
+
+def _remember_exchange(prompt: str, response) -> str:
+    """Format a Gemini response and record the exchange in context memory."""
+    formatted_response = response.text.strip() if response.text else "I couldn't process that."
+    context_memory.append(f"User: {prompt}\nEcho: {formatted_response}")
+    if len(context_memory) > MEMORY_LIMIT:
+        context_memory.pop(0)
+    return formatted_response
 
 
 def ask_gemini(prompt: str) -> str:
@@ -136,25 +401,23 @@ def ask_gemini(prompt: str) -> str:
 
     try:
         model = genai.GenerativeModel("gemini-2.0-flash")
-        system_prompt = """
-            You are an advanced, context-aware AI assistant named Echo, designed to deliver precise, insightful, and efficient responses. Your primary goal is to provide clear, intelligent, and engaging answers while maintaining brevity and relevance. Follow these principles:
-            - Adapt to Context & Mood: Align your tone with the user's mood and the nature of the conversation—whether casual, professional, or highly technical.
-            - Be Concise, Yet Complete: Deliver well-structured responses that are neither too short nor unnecessarily verbose. Prioritize clarity and depth without over-explaining.
-            - No Redundancy: Avoid repeating information or your name ("Echo") unless necessary for clarity or emphasis.
-            - Ask Smart Questions: If a query lacks clarity, request precise details with a brief, targeted question.
-            - Ensure Logical Flow: Keep responses interconnected, ensuring a seamless and engaging dialogue.
-            - Encourage Exploration: When relevant, subtly suggest related ideas or next steps to enhance the user's understanding.
-            - Prioritize Accuracy & Relevance: Always provide well-reasoned, factual, and contextually appropriate responses.
-            Your mission: Deliver an exceptional user experience with every interaction. Avoid starting responses with "Echo" or self-referential phrases unless explicitly asked about your identity.
-        """
-        memory_context = "\n".join(context_memory)
-        full_prompt = f"{system_prompt}\n{memory_context}\nUser: {prompt}"
-        response = model.generate_content(full_prompt)
-        formatted_response = response.text.strip() if response.text else "I couldn't process that."
-        context_memory.append(f"User: {prompt}\nEcho: {formatted_response}")
-        if len(context_memory) > MEMORY_LIMIT:
-            context_memory.pop(0)
-        return formatted_response
+        response = model.generate_content(_build_gemini_prompt(prompt))
+        return _remember_exchange(prompt, response)
+    except Exception as e:
+        return f"I'm having trouble connecting to my AI service. Error: {str(e)}"
+
+
+async def ask_gemini_async(prompt: str) -> str:
+    """Query Gemini AI model without blocking the event loop."""
+    if not GEMINI_AVAILABLE:
+        return "Gemini AI is not available. Please install google-generativeai and add your API key."
+
+    try:
+        model = genai.GenerativeModel("gemini-2.0-flash")
+        response = await model.generate_content_async(_build_gemini_prompt(prompt))
+        return _remember_exchange(prompt, response)
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
         return f"I'm having trouble connecting to my AI service. Error: {str(e)}"
 
@@ -164,6 +427,274 @@ def get_day_date() -> str:
     return datetime.datetime.now().strftime("%A, %B %d, %Y")
 
 
+def _normalize_app_name(name: str) -> str:
+    """Lowercase an application name and strip separators for matching."""
+    name = name.lower()
+    if name.endswith(".exe"):
+        name = name[:-4]
+    return re.sub(r"[^a-z0-9+]", "", name)
+
+
+def _trigrams(name: str) -> set:
+    """Return the character trigrams of a normalized name."""
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _desktop_dirs() -> list:
+    """Return the XDG directories that may hold .desktop files."""
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    data_dirs = os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share"
+    dirs = [data_home] + data_dirs.split(os.pathsep)
+    dirs.append("/var/lib/flatpak/exports/share")
+    return [os.path.join(d, "applications") for d in dirs if d]
+
+
+def _parse_desktop_file(path: str) -> dict:
+    """Map the names of a launchable .desktop entry to its command line."""
+    fields = {}
+    in_entry = False
+    try:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("["):
+                    in_entry = line == "[Desktop Entry]"
+                elif in_entry and "=" in line:
+                    key, value = line.split("=", 1)
+                    fields.setdefault(key.strip(), value.strip())
+    except OSError:
+        return {}
+    if fields.get("Type", "Application") != "Application" or not fields.get("Exec"):
+        return {}
+    if fields.get("NoDisplay") == "true" or fields.get("Hidden") == "true" or fields.get("Terminal") == "true":
+        return {}
+    command = DESKTOP_FIELD_CODES.sub("", fields["Exec"]).replace("%%", "%").strip()
+    names = [fields.get("Name", ""), fields.get("GenericName", ""), os.path.splitext(os.path.basename(path))[0]]
+    names.extend(fields.get("Keywords", "").split(";"))
+    return {name: command for name in names if name}
+
+
+def _scan_path_dir(directory: str) -> dict:
+    """Map the executables in a $PATH directory to their full paths."""
+    if os.name == "nt":
+        extensions = tuple(os.environ.get("PATHEXT", ".EXE;.BAT;.CMD").lower().split(";"))
+    entries = {}
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                if os.name == "nt":
+                    if entry.name.lower().endswith(extensions):
+                        entries[os.path.splitext(entry.name)[0]] = entry.path
+                elif os.access(entry.path, os.X_OK):
+                    entries[entry.name] = shlex.quote(entry.path)
+    except OSError:
+        pass
+    return entries
+
+
+def _command_name(command_line: str) -> str:
+    """Return the normalized name of the program a command line runs."""
+    try:
+        args = shlex.split(command_line, posix=os.name != "nt")
+    except ValueError:
+        return ""
+    return _normalize_app_name(os.path.basename(args[0].strip('"'))) if args else ""
+
+
+def _scan_desktop_dir(directory: str) -> dict:
+    """Map the names of every .desktop entry in a directory to its command."""
+    entries = {}
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.endswith(".desktop"):
+                    entries.update(_parse_desktop_file(entry.path))
+    except OSError:
+        pass
+    return entries
+
+
+def _load_aliases(path: str) -> dict:
+    """Load user-defined application aliases on top of APP_PATHS."""
+    aliases = dict(APP_PATHS)
+    try:
+        with open(path, encoding="utf-8") as f:
+            aliases.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+    return aliases
+
+
+class AppCatalog:
+    """On-disk index of installed applications with fuzzy name lookup.
+
+    Sources are .desktop files, user aliases and $PATH executables. A $PATH
+    executable is only indexed when a .desktop Exec or an alias runs it, so
+    arbitrary command-line tools never become voice-launchable, and names in
+    APP_DENYLIST are dropped from every source. Each source is rescanned
+    only when its mtime changes, and lookups go through an exact, prefix and
+    trigram matcher held in memory.
+    """
+
+    def __init__(self, index_path: str = APP_INDEX_PATH, aliases_path: str = APP_ALIASES_PATH):
+        self.index_path = index_path
+        self.aliases_path = aliases_path
+        self._sources = None
+        self._names = {}
+        self._sorted_names = []
+        self._trigram_index = {}
+        self._gram_counts = {}
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def _source_list(self) -> list:
+        """Return (kind, path) pairs for every source that should be indexed."""
+        sources = [("desktop", d) for d in _desktop_dirs()]
+        sources += [
+            ("path", d) for d in os.environ.get("PATH", "").split(os.pathsep)
+            if d and os.path.basename(os.path.normpath(d)) != "sbin"
+        ]
+        sources.append(("aliases", self.aliases_path))
+        return sources
+
+    def _load_index(self):
+        """Read the persisted index, ignoring it if missing or corrupt."""
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            self._sources = index["sources"] if index.get("version") == APP_INDEX_VERSION else {}
+        except (OSError, ValueError, KeyError, AttributeError):
+            self._sources = {}
+
+    def _save_index(self):
+        """Persist the index so the next start only rescans changed sources."""
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": APP_INDEX_VERSION, "sources": self._sources}, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass
+
+    def refresh(self, force: bool = False):
+        """Rescan sources whose mtime changed and rebuild the lookup tables."""
+        with self._lock:
+            if not force and time.monotonic() - self._last_refresh < APP_INDEX_REFRESH_INTERVAL:
+                return
+            if self._sources is None:
+                self._load_index()
+            changed = False
+            current = {}
+            for kind, path in self._source_list():
+                key = f"{kind}:{path}"
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    mtime = None
+                cached = self._sources.get(key)
+                if cached is not None and cached["mtime"] == mtime and not force:
+                    current[key] = cached
+                    continue
+                if kind == "desktop":
+                    entries = _scan_desktop_dir(path) if mtime is not None else {}
+                elif kind == "path":
+                    entries = _scan_path_dir(path) if mtime is not None else {}
+                else:
+                    entries = _load_aliases(path)
+                current[key] = {"mtime": mtime, "entries": entries}
+                changed = True
+            if changed or set(current) != set(self._sources) or not self._names:
+                self._sources = current
+                self._rebuild()
+                if changed:
+                    self._save_index()
+            self._last_refresh = time.monotonic()
+
+    def _rebuild(self):
+        """Build the exact-name, prefix and trigram tables from the sources."""
+        names = {}
+        # Aliases override .desktop entries
+        for kind in ("desktop", "aliases"):
+            for key, source in self._sources.items():
+                if key.startswith(f"{kind}:"):
+                    for name, command in source["entries"].items():
+                        normalized = _normalize_app_name(name)
+                        if normalized:
+                            names[normalized] = command
+        launched = {_command_name(command) for command in names.values()}
+        for key, source in self._sources.items():
+            if key.startswith("path:"):
+                for name, command in source["entries"].items():
+                    normalized = _normalize_app_name(name)
+                    if normalized in launched and normalized not in names:
+                        names[normalized] = command
+        names = {
+            name: command for name, command in names.items()
+            if name not in APP_DENYLIST and _command_name(command) not in APP_DENYLIST
+        }
+        trigram_index = {}
+        gram_counts = {}
+        for name in names:
+            grams = _trigrams(name)
+            gram_counts[name] = len(grams)
+            for gram in grams:
+                trigram_index.setdefault(gram, []).append(name)
+        self._names = names
+        self._sorted_names = sorted(names)
+        self._trigram_index = trigram_index
+        self._gram_counts = gram_counts
+
+    def lookup(self, query: str):
+        """Return the command line for the best matching application, or None."""
+        query = _normalize_app_name(query)
+        if not query:
+            return None
+        names = self._names
+        if query in names:
+            return names[query]
+
+        # Shortest indexed name that starts with the query
+        sorted_names = self._sorted_names
+        if len(query) >= 3:
+            start = bisect.bisect_left(sorted_names, query)
+            best = None
+            for name in sorted_names[start:start + 50]:
+                if not name.startswith(query):
+                    break
+                if best is None or len(name) < len(best):
+                    best = name
+            if best:
+                return names[best]
+
+        query_grams = _trigrams(query)
+        counts = Counter()
+        for gram in query_grams:
+            counts.update(self._trigram_index.get(gram, ()))
+        best, best_score = None, 0.0
+        for name, shared in counts.items():
+            score = shared / (len(query_grams) + self._gram_counts[name] - shared)
+            if score > best_score:
+                best, best_score = name, score
+        return names[best] if best_score >= APP_MATCH_THRESHOLD else None
+
+
+app_catalog = AppCatalog()
+
+
+def launch_application(command_line: str):
+    """Start an application from a catalog command line."""
+    args = command_line if os.name == "nt" else shlex.split(command_line)
+    subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=os.name != "nt")
+
+
 def close_application(app_name: str) -> bool:
     """Close the specified application."""
     closed = False
@@ -193,6 +724,8 @@ def set_volume(level: int) -> bool:
 
 def set_brightness(level: int) -> bool:
     """Set screen brightness to the specified level."""
+    if not BRIGHTNESS_CONTROL_AVAILABLE:
+        return False
     try:
         c = wmi.WMI(namespace='wmi')
         methods = c.WmiMonitorBrightnessMethods()[0]
@@ -202,8 +735,8 @@ def set_brightness(level: int) -> bool:
         return False
 
 
-def identify_intent(command: str) -> str:
-    """Identify the intent of the user's command."""
+def keyword_intent(command: str) -> str:
+    """Identify the intent of a command from INTENT_CATEGORIES keywords."""
     command_lower = command.lower()
     for intent, keywords in INTENT_CATEGORIES.items():
         if any(keyword in command_lower for keyword in keywords):
@@ -211,36 +744,475 @@ def identify_intent(command: str) -> str:
     return "ai_chat"
 
 
+def load_intent_classifier():
+    """Train the intent classifier from intents.tsv once, if NumPy is available."""
+    global intent_classifier
+    if not INTENT_CLASSIFIER_AVAILABLE:
+        return None
+    with intent_classifier_lock:
+        if intent_classifier is None:
+            try:
+                intent_classifier = IntentClassifier.from_file(INTENT_TRAINING_PATH)
+            except (OSError, ValueError):
+                return None
+    return intent_classifier
+
+
+def classify_intent(command: str) -> list:
+    """Return (intent, confidence) pairs for a command, most likely first."""
+    classifier = intent_classifier or load_intent_classifier()
+    if classifier is None:
+        return [(keyword_intent(command), 1.0)]
+    return classifier.rank(command)
+
+
+def identify_intent(command: str) -> str:
+    """Identify the intent of the user's command."""
+    return classify_intent(command)[0][0]
+
+
+def split_compound_command(command: str) -> list:
+    """Split an utterance into stages of independent actions.
+
+    Actions inside a stage can run concurrently; stages are separated by
+    sequencing words such as "then" and must run in order. A fragment that
+    does not start like a command is kept with the previous action, so
+    "tell me about salt and pepper" stays a single action.
+    """
+    parts = CONJUNCTION_PATTERN.split(command.strip())
+    stages = [[parts[0].strip()]]
+    for i in range(1, len(parts), 2):
+        separator = parts[i] or ","
+        segment = parts[i + 1].strip() if i + 1 < len(parts) else ""
+        if not segment:
+            continue
+        if segment.startswith(COMMAND_STARTERS):
+            if separator in SEQUENCE_WORDS:
+                stages.append([segment])
+            else:
+                stages[-1].append(segment)
+        else:
+            joiner = ", " if separator == "," else f" {separator} "
+            stages[-1][-1] = f"{stages[-1][-1]}{joiner}{segment}"
+    stages = [[action for action in stage if action] for stage in stages if any(stage)]
+    return stages or [[command.strip()]]
+
+
+def combine_responses(responses: list) -> str:
+    """Join several handler responses into a single spoken reply."""
+    sentences = []
+    for response in responses:
+        response = response.strip()
+        if response:
+            sentences.append(response if response[-1] in ".!?" else f"{response}.")
+    return " ".join(sentences)
+
+
+def format_number(value: float) -> str:
+    """Format a result so it reads naturally when spoken."""
+    if isinstance(value, complex):
+        raise ValueError("complex result")
+    if isinstance(value, int):
+        if abs(value) < 10 ** 15:
+            return str(value)
+        # Decimal rounds integers of any size; f"{value:.6g}" overflows past 1e308
+        mantissa, exponent = f"{decimal.Decimal(value):.5e}".split("e")
+        return f"{mantissa.rstrip('0').rstrip('.')}e{exponent}"
+    if math.isinf(value):
+        raise OverflowError("result too large")
+    if abs(value) < 1e15 and value == int(value):
+        return str(int(value))
+    if abs(value) >= 1e15 or abs(value) < 1e-6:
+        return f"{value:.6g}"
+    return f"{value:.6f}".rstrip("0").rstrip(".")
+
+
+def _eval_node(node):
+    """Evaluate a whitelisted arithmetic AST node."""
+    if isinstance(node, ast.Expression):
+        return _eval_node(node.body)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in ARITHMETIC_OPERATORS:
+        left, right = _eval_node(node.left), _eval_node(node.right)
+        if isinstance(node.op, ast.Pow):
+            if abs(right) > MAX_EXPONENT:
+                raise OverflowError("exponent too large")
+            # Float powers overflow on their own; integer ones grow without bound
+            if isinstance(left, int) and isinstance(right, int) and abs(left).bit_length() * right > MAX_RESULT_BITS:
+                raise OverflowError("result too large")
+        return ARITHMETIC_OPERATORS[type(node.op)](left, right)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in ARITHMETIC_OPERATORS:
+        return ARITHMETIC_OPERATORS[type(node.op)](_eval_node(node.operand))
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "sqrt"
+            and len(node.args) == 1 and not node.keywords):
+        return math.sqrt(_eval_node(node.args[0]))
+    raise ValueError("unsupported expression")
+
+
+def evaluate_arithmetic(command: str):
+    """Answer spoken arithmetic such as "what is 15 percent of 240"."""
+    match = ARITHMETIC_PREFIX.match(command)
+    spoken = match.group(1) if match else command
+    expression = spoken.replace(",", "")
+    for pattern, replacement in ARITHMETIC_WORDS:
+        expression = re.sub(pattern, replacement, expression)
+    if not re.search(r"\d", expression) or not re.fullmatch(r"[\d.\s+\-*/%()]*", expression.replace("sqrt", "")):
+        return None
+    if not re.search(r"[+\-*/%]|sqrt", expression.lstrip("-")):
+        return None
+    try:
+        result = _eval_node(ast.parse(expression.strip(), mode="eval"))
+        return f"{spoken} is {format_number(result)}"
+    except ZeroDivisionError:
+        return "You can't divide by zero"
+    except OverflowError:
+        return f"{spoken} is too large for me to work out"
+    except (SyntaxError, ValueError, TypeError):
+        return None
+
+
+def _convert_temperature(value: float, source: str, target: str) -> float:
+    """Convert a temperature between Celsius, Fahrenheit and Kelvin."""
+    celsius = {"c": value, "f": (value - 32) * 5 / 9, "k": value - 273.15}[source]
+    return {"c": celsius, "f": celsius * 9 / 5 + 32, "k": celsius + 273.15}[target]
+
+
+def convert_units(command: str):
+    """Answer unit conversions such as "convert 5 miles to km"."""
+    match = UNIT_PATTERN.match(command)
+    if match:
+        amount, source, target = match.groups()
+    else:
+        # "how many feet are in 3 meters" names the target first
+        match = HOW_MANY_PATTERN.match(command)
+        if not match:
+            return None
+        target, amount, source = match.groups()
+    value = float(amount.replace(",", "")) if amount else 1.0
+    source, target = source.strip(), target.strip()
+    source = re.sub(r"^degrees?\s+", "degrees ", source)
+    target = re.sub(r"^degrees?\s+", "degrees ", target)
+    if source in TEMPERATURE_UNITS and target in TEMPERATURE_UNITS:
+        result = _convert_temperature(value, TEMPERATURE_UNITS[source], TEMPERATURE_UNITS[target])
+    elif source in UNITS and target in UNITS and UNITS[source][0] == UNITS[target][0]:
+        result = value * UNITS[source][1] / UNITS[target][1]
+    else:
+        return None
+    return f"{format_number(value)} {source} is {format_number(round(result, 4))} {target}"
+
+
+def parse_duration(text: str) -> float:
+    """Sum every "N minutes/hours/seconds" phrase in text, in seconds."""
+    total = 0.0
+    for amount, unit in DURATION_PATTERN.findall(text):
+        count = 1.0 if amount in ("a", "an", "one") else float(amount)
+        total += count * DURATION_SECONDS[unit[0]]
+    return total
+
+
+def describe_duration(seconds: float) -> str:
+    """Describe a duration in words, e.g. "1 hour 30 minutes"."""
+    parts = []
+    for name, size in (("hour", 3600), ("minute", 60), ("second", 1)):
+        amount, seconds = divmod(int(round(seconds)), size) if size > 1 else (int(round(seconds)), 0)
+        if amount:
+            parts.append(f"{amount} {name}{'s' if amount != 1 else ''}")
+    return " ".join(parts) or "0 seconds"
+
+
+def parse_clock_time(text: str):
+    """Return the next datetime matching "at 5 pm" / "at 17:30", or None."""
+    match = CLOCK_PATTERN.search(text)
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem:
+        if hour > 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.startswith("p") else 0)
+    if hour > 23 or minute > 59:
+        return None
+    now = datetime.datetime.now()
+    due = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if due <= now:
+        due += datetime.timedelta(days=1)
+    return due
+
+
+def _duckduckgo_answer(data: dict) -> str:
+    """Extract the best answer text from a DuckDuckGo API response."""
+    if data.get("AbstractText"):
+        return data["AbstractText"]
+    elif data.get("RelatedTopics") and data["RelatedTopics"]:
+        if data["RelatedTopics"][0].get("Text"):
+            return data["RelatedTopics"][0]["Text"]
+    return None
+
+
 def duckduckgo_search(query: str) -> str:
     """Perform a search using DuckDuckGo API."""
-    url = f"http://api.duckduckgo.com/?q={query}&format=json&no_redirect=1"
+    params = {"q": query, "format": "json", "no_redirect": "1"}
     try:
-        response = requests.get(url, timeout=5)
-        data = response.json()
-        if data.get("AbstractText"):
-            return data["AbstractText"]
-        elif data.get("RelatedTopics") and data["RelatedTopics"]:
-            if data["RelatedTopics"][0].get("Text"):
-                return data["RelatedTopics"][0]["Text"]
+        response = requests.get(DUCKDUCKGO_API_URL, params=params, timeout=5)
+        return _duckduckgo_answer(response.json())
+    except Exception:
         return None
+
+
+async def duckduckgo_search_async(query: str) -> str:
+    """Perform a DuckDuckGo search with aiohttp, falling back to the executor."""
+    if not AIOHTTP_AVAILABLE:
+        return await run_blocking(duckduckgo_search, query)
+    params = {"q": query, "format": "json", "no_redirect": "1"}
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+            async with session.get(DUCKDUCKGO_API_URL, params=params) as response:
+                return _duckduckgo_answer(await response.json(content_type=None))
+    except asyncio.CancelledError:
+        raise
     except Exception:
         return None
 
 
+def _pcm_to_float(raw: bytes, sample_width: int) -> "np.ndarray":
+    """Decode little-endian PCM bytes into float32 samples in [-1, 1]."""
+    if sample_width == 1:
+        # AudioData.get_raw_data() already re-biases 8-bit audio to signed
+        return np.frombuffer(raw, dtype=np.int8).astype(np.float32) / 128.0
+    if sample_width == 3:
+        triplets = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = triplets[:, 0] | (triplets[:, 1] << 8) | (triplets[:, 2] << 16)
+        samples = np.where(samples & 0x800000, samples - 0x1000000, samples)
+        return samples.astype(np.float32) / float(1 << 23)
+    dtype = np.int16 if sample_width == 2 else np.int32
+    return np.frombuffer(raw, dtype=dtype).astype(np.float32) / float(np.iinfo(dtype).max)
+
+
+def _anti_alias(samples: "np.ndarray", rate: int) -> "np.ndarray":
+    """Low-pass samples below the target Nyquist frequency before decimation."""
+    cutoff = 0.45 * TARGET_SAMPLE_RATE / rate
+    taps = np.arange(ANTI_ALIAS_TAPS) - (ANTI_ALIAS_TAPS - 1) / 2
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.blackman(ANTI_ALIAS_TAPS)
+    kernel /= kernel.sum()
+    return np.convolve(samples, kernel.astype(np.float32), mode="same")
+
+
+def preprocess_audio(audio: sr.AudioData) -> tuple:
+    """Trim silence and resample captured audio to 16 kHz 16-bit mono.
+
+    Returns the compacted AudioData and the number of PCM bytes saved. The
+    recognizer backend encodes whatever it receives to FLAC, so a smaller
+    input translates directly into a smaller upload.
+    """
+    raw = audio.get_raw_data()
+    if not NUMPY_AVAILABLE or not raw:
+        return audio, 0
+    try:
+        rate = audio.sample_rate
+        samples = _pcm_to_float(raw, audio.sample_width)
+
+        # Trim leading/trailing frames whose RMS energy stays below the threshold
+        frame_len = max(1, int(rate * SILENCE_FRAME))
+        frame_count = len(samples) // frame_len
+        if frame_count:
+            frames = samples[:frame_count * frame_len].reshape(frame_count, frame_len)
+            rms = np.sqrt(np.mean(np.square(frames), axis=1))
+            voiced = np.flatnonzero(rms >= SILENCE_THRESHOLD)
+            if voiced.size:
+                padding = int(rate * SILENCE_PADDING)
+                start = max(0, voiced[0] * frame_len - padding)
+                end = min(len(samples), (voiced[-1] + 1) * frame_len + padding)
+                samples = samples[start:end]
+
+        if rate > TARGET_SAMPLE_RATE:
+            samples = _anti_alias(samples, rate)
+        if rate != TARGET_SAMPLE_RATE:
+            out_len = max(1, int(round(len(samples) * TARGET_SAMPLE_RATE / rate)))
+            positions = np.arange(out_len, dtype=np.float64) * (rate / TARGET_SAMPLE_RATE)
+            samples = np.interp(positions, np.arange(len(samples)), samples)
+
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+        if len(pcm) >= len(raw):
+            return audio, 0
+        return sr.AudioData(pcm, TARGET_SAMPLE_RATE, 2), len(raw) - len(pcm)
+    except Exception:
+        return audio, 0
+
+
+class ReminderScheduler(QObject):
+    """In-process timer and reminder queue backed by a heap.
+
+    A single daemon thread sleeps on a condition until the earliest entry is
+    due, so an idle scheduler never wakes up. Due entries are announced via
+    the fired signal.
+    """
+    fired = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self._heap = []
+        self._counter = 0
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def schedule(self, delay: float, message: str) -> float:
+        """Queue a message to fire after delay seconds; return its due time."""
+        due = time.time() + delay
+        with self._condition:
+            self._counter += 1
+            heapq.heappush(self._heap, (due, self._counter, message))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return due
+
+    def cancel_all(self) -> int:
+        """Drop every pending timer and reminder; return how many were dropped."""
+        with self._condition:
+            count = len(self._heap)
+            self._heap.clear()
+            self._condition.notify()
+        return count
+
+    def pending(self) -> int:
+        """Return the number of queued timers and reminders."""
+        with self._condition:
+            return len(self._heap)
+
+    def _run(self):
+        """Fire entries as they come due."""
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.time():
+                    self._condition.wait(self._heap[0][0] - time.time() if self._heap else None)
+                    wakeup_counters["scheduler_wakeups"] += 1
+                _, _, message = heapq.heappop(self._heap)
+            self.fired.emit(message)
+
+
+reminder_scheduler = ReminderScheduler()
+
+
+def schedule_timer_or_reminder(command: str):
+    """Handle "set a timer for ..." and "remind me to ... in/at ..." locally."""
+    if re.search(r"\bcancel\b.*\b(?:timers?|reminders?)\b", command):
+        count = reminder_scheduler.cancel_all()
+        return f"Cancelled {count} timer{'s' if count != 1 else ''} and reminders" if count else "You have no timers or reminders"
+
+    reminder = REMINDER_PATTERN.match(command)
+    if reminder:
+        text = reminder.group(1)
+        due_at = parse_clock_time(text)
+        if due_at:
+            task = CLOCK_PATTERN.sub("", text)
+            delay = (due_at - datetime.datetime.now()).total_seconds()
+        else:
+            delay = parse_duration(text)
+            task = re.sub(r"\b(?:in|after|for)\s+" + DURATION_PATTERN.pattern, "", text)
+            task = DURATION_PATTERN.sub("", task)
+            due_at = datetime.datetime.now() + datetime.timedelta(seconds=delay)
+        task = re.sub(r"^to\s+", "", " ".join(task.split()))
+        if delay <= 0:
+            return "When should I remind you?"
+        if not task:
+            return "What should I remind you about?"
+        reminder_scheduler.schedule(delay, f"Reminder: {task}")
+        return f"I'll remind you to {task} at {due_at.strftime('%I:%M %p')}"
+
+    if re.search(r"\btimer\b", command):
+        delay = parse_duration(command)
+        if delay <= 0:
+            return None
+        description = describe_duration(delay)
+        reminder_scheduler.schedule(delay, f"Your {description} timer is done")
+        return f"Timer set for {description}"
+    return None
+
+
+def evaluate_locally(command: str):
+    """Answer timers, reminders, unit conversions and arithmetic without the network."""
+    for evaluator in (schedule_timer_or_reminder, convert_units, evaluate_arithmetic):
+        answer = evaluator(command)
+        if answer:
+            return answer
+    return None
+
+
+class SessionRecorder:
+    """Record each voice turn's raw captured audio, transcript and response.
+
+    Turns are written to a directory as turn_NNNN.wav files plus a
+    session.jsonl manifest that loadtest.py can replay.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "session.jsonl")
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self._turn = sum(1 for _ in f)
+        except OSError:
+            self._turn = 0
+
+    def record(self, audio: sr.AudioData, transcript: str, response: str, process_seconds: float):
+        """Append one turn to the recording."""
+        with self._lock:
+            self._turn += 1
+            audio_name = f"turn_{self._turn:04d}.wav"
+            try:
+                with open(os.path.join(self.directory, audio_name), "wb") as f:
+                    f.write(audio.get_wav_data())
+                with open(self.manifest_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({
+                        "turn": self._turn,
+                        "audio": audio_name,
+                        "transcript": transcript,
+                        "response": response,
+                        "process_seconds": round(process_seconds, 4),
+                        "recorded_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                    }) + "\n")
+            except OSError:
+                pass
+
+
+memory_diagnostics = MemoryDiagnostics(MEMORY_REPORT_PATH) if MEMORY_REPORT_PATH else None
+
+
+def record_memory_turn(label: str):
+    """Hand the finished turn's object counts to the memory diagnostics thread."""
+    if memory_diagnostics:
+        memory_diagnostics.record_turn(label, {
+            "widgets": len(QApplication.allWidgets()),
+            "voice_workers": len(VoiceWorker.live),
+            "threads": threading.active_count(),
+            "asyncio_tasks": len(asyncio.all_tasks(loop)),
+        })
+
+
 class VoiceWorker(QThread):
     """Worker thread for handling voice recognition."""
     transcribed = pyqtSignal(str, str)
     response_ready = pyqtSignal(str)
     status = pyqtSignal(str)
     error = pyqtSignal(str)
+    live = weakref.WeakSet()
 
-    def __init__(self):
+    def __init__(self, idle_release_delay: float = IDLE_RELEASE_DELAY):
         super().__init__()
+        VoiceWorker.live.add(self)
+        self.idle_release_delay = idle_release_delay
         self._stop_event = threading.Event()
         self._pause_event = threading.Event()
         self._pause_event.set()
         self.recognizer = sr.Recognizer()
         self.microphone = None
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self.recorder = SessionRecorder(RECORD_DIR) if RECORD_DIR else None
 
     def run(self):
         """Main loop for voice recognition."""
@@ -254,11 +1226,13 @@ class VoiceWorker(QThread):
             self.recognizer.dynamic_energy_threshold = True
             self.recognizer.pause_threshold = 0.8
             self.recognizer.phrase_threshold = 0.3
+            app_catalog.refresh()
+            load_intent_classifier()
             self.status.emit("Ready - Say something to Echo...")
 
             while not self._stop_event.is_set():
                 if not self._pause_event.is_set():
-                    self.msleep(100)
+                    self.wait_while_paused()
                     continue
                 try:
                     with self.microphone as source:
@@ -267,13 +1241,17 @@ class VoiceWorker(QThread):
                             timeout=1,
                             phrase_time_limit=8
                         )
+                    captured = audio
+                    audio, saved = preprocess_audio(captured)
+                    if saved:
+                        logger.info("Compacted audio: saved %d bytes", saved)
+                        self.status.emit(f"Compacted audio: saved {saved} bytes")
                     try:
                         command = self.recognizer.recognize_google(audio).lower()
                         if command.strip():
                             intent = identify_intent(command)
                             self.transcribed.emit(command, intent)
-                            response = self.process_command(command)
-                            self.response_ready.emit(response)
+                            self.submit_command(command, captured)
                             self.status.emit("Listening...")
                     except sr.UnknownValueError:
                         self.status.emit("Could not understand. Try speaking more clearly.")
@@ -288,122 +1266,220 @@ class VoiceWorker(QThread):
                     break
         except Exception as e:
             self.error.emit(f"Failed to initialize microphone: {e}")
+        release_mixer()
+        logger.info("Voice recognition stopped; wakeups: %s", dict(wakeup_counters))
         self.status.emit("Voice recognition stopped.")
 
-    def process_command(self, command: str) -> str:
+    def wait_while_paused(self):
+        """Block until resumed or stopped, releasing the mixer once idle.
+
+        The microphone needs no release: sr.Microphone only opens its stream
+        inside a with block, so nothing is held while paused.
+        """
+        wakeup_counters["pause_wakeups"] += 1
+        if self._pause_event.wait(self.idle_release_delay):
+            return
+        release_mixer()
+        logger.info("Idle for %ss; mixer released; wakeups: %s", self.idle_release_delay, dict(wakeup_counters))
+        self.status.emit("Idle - audio output released")
+        self._pause_event.wait()
+        wakeup_counters["pause_wakeups"] += 1
+        if not self._stop_event.is_set():
+            logger.info("Resumed; wakeups: %s", dict(wakeup_counters))
+            self.status.emit("Resumed")
+
+    def submit_command(self, command: str, audio: sr.AudioData = None):
+        """Schedule a command on the shared loop without waiting for it."""
+        future = asyncio.run_coroutine_threadsafe(self._handle_command(command, audio), loop)
+        with self._pending_lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard_pending)
+
+    def _discard_pending(self, future):
+        """Forget a finished command future."""
+        with self._pending_lock:
+            self._pending.discard(future)
+
+    async def _handle_command(self, command: str, audio: sr.AudioData = None):
+        """Run a command handler and emit its response."""
+        started = time.perf_counter()
+        response = await self.process_compound_command(command)
+        if self.recorder and audio is not None:
+            await run_blocking(self.recorder.record, audio, command, response, time.perf_counter() - started)
+        if not self._stop_event.is_set():
+            self.response_ready.emit(response)
+
+    def cancel_pending(self):
+        """Cancel every command that is still in flight."""
+        with self._pending_lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.cancel()
+
+    async def process_compound_command(self, command: str) -> str:
+        """Run every action in a compound utterance and combine the replies."""
+        stages = split_compound_command(command)
+        if len(stages) == 1 and len(stages[0]) == 1:
+            return await self.process_command(stages[0][0])
+        responses = []
+        for stage in stages:
+            responses.extend(await asyncio.gather(*(self.process_command(action) for action in stage)))
+        return combine_responses(responses)
+
+    async def process_command(self, command: str) -> str:
         """Process voice commands and return appropriate responses."""
         try:
-            if "play" in command and any(word in command for word in ["song", "music", "on youtube", "youtube"]):
-                song = command.replace("play", "").replace("song", "").replace("music", "").replace("on youtube",
-                                                                                                    "").replace(
-                    "youtube", "").strip()
-                if song:
-                    try:
-                        pywhatkit.playonyt(song)
-                        return f"Playing {song} on YouTube"
-                    except:
-                        return f"Sorry, I couldn't play {song}"
-                return "What would you like me to play?"
-            elif "time" in command:
-                time_now = datetime.datetime.now().strftime('%I:%M %p')
-                return f"The current time is {time_now}"
-            elif "date" in command or "day" in command:
-                return f"Today is {get_day_date()}"
-            elif any(phrase in command for phrase in ["tell me about", "who is", "what is", "explain"]):
-                subject = command
-                for phrase in ["tell me about", "who is", "what is", "explain"]:
-                    subject = subject.replace(phrase, "").strip()
-                if subject:
-                    try:
-                        info = wikipedia.summary(subject, sentences=2)
-                        return info
-                    except wikipedia.exceptions.DisambiguationError:
-                        return f"There are multiple results for {subject}. Can you be more specific?"
-                    except wikipedia.exceptions.PageError:
-                        return f"I couldn't find information about {subject}"
-                return "What would you like to know about?"
-            elif "open" in command:
-                app_or_site = command.replace("open", "").strip()
-                if app_or_site in APP_PATHS:
-                    try:
-                        subprocess.Popen(APP_PATHS[app_or_site])
-                        return f"Opening {app_or_site}"
-                    except:
-                        return f"I couldn't open {app_or_site}"
-                else:
-                    try:
-                        if "." in app_or_site or any(
-                                site in app_or_site for site in ["google", "youtube", "facebook", "twitter"]):
-                            if not app_or_site.startswith("http"):
-                                app_or_site = f"https://{app_or_site}" if "." in app_or_site else f"https://www.{app_or_site}.com"
-                            webbrowser.open(app_or_site)
-                            return f"Opening {app_or_site} in browser"
-                        else:
-                            webbrowser.open(f"https://www.google.com/search?q={app_or_site}")
-                            return f"Searching for {app_or_site}"
-                    except:
-                        return f"I couldn't open {app_or_site}"
-            elif "close" in command:
-                app = command.replace("close", "").strip()
-                return f"Closed {app}" if close_application(app) else f"I couldn't find {app} to close"
-            elif "search" in command or "look up" in command:
-                query = command.replace("search", "").replace("look up", "").strip()
-                if query:
-                    result = duckduckgo_search(query)
-                    if result:
-                        return result[:200] + "..." if len(result) > 200 else result
-                    else:
-                        webbrowser.open(f"https://www.google.com/search?q={query}")
-                        return f"I couldn't find a quick answer, so I opened a search for {query}"
-                return "What would you like me to search for?"
-            elif "volume" in command:
-                try:
-                    if "set volume" in command or "volume to" in command:
-                        words = command.split()
-                        for word in words:
-                            if word.isdigit():
-                                level = int(word)
-                                if 0 <= level <= 100:
-                                    return f"Volume set to {level}%" if set_volume(
-                                        level) else "I couldn't change the volume"
-                                return "Volume must be between 0 and 100"
-                    elif "increase volume" in command or "volume up" in command:
-                        return "Volume increased" if set_volume(75) else "I couldn't increase the volume"
-                    elif "decrease volume" in command or "volume down" in command:
-                        return "Volume decreased" if set_volume(25) else "I couldn't decrease the volume"
-                    return "Please specify a volume level between 0 and 100"
-                except:
-                    return "I couldn't change the volume"
-            elif "brightness" in command:
-                try:
-                    if "set brightness" in command or "brightness to" in command:
-                        words = command.split()
-                        for word in words:
-                            if word.isdigit():
-                                level = int(word)
-                                if 0 <= level <= 100:
-                                    return f"Brightness set to {level}%" if set_brightness(
-                                        level) else "I couldn't change the brightness"
-                                return "Brightness must be between 0 and 100"
-                    elif "increase brightness" in command or "brightness up" in command:
-                        return "Brightness increased" if set_brightness(80) else "I couldn't increase the brightness"
-                    elif "decrease brightness" in command or "brightness down" in command:
-                        return "Brightness decreased" if set_brightness(30) else "I couldn't decrease the brightness"
-                    return "Please specify a brightness level between 0 and 100"
-                except:
-                    return "I couldn't change the brightness"
-            elif "weather" in command:
-                location = command.split(" in ")[-1].strip() if " in " in command else "current location"
-                webbrowser.open(f"https://www.google.com/search?q=weather+{location}")
-                return f"Opening weather information for {location}"
-            else:
-                return ask_gemini(command)
+            local_answer = evaluate_locally(command)
+            if local_answer:
+                return local_answer
+            intent, confidence = classify_intent(command)[0]
+            handler = {
+                "media_control": self._handle_media,
+                "time_date": self._handle_time_date,
+                "information": self._handle_information,
+                "system_control": self._handle_system_control,
+                "weather": self._handle_weather,
+            }.get(intent) if confidence >= INTENT_CONFIDENCE_THRESHOLD else None
+            response = await handler(command) if handler else None
+            return response if response is not None else await ask_gemini_async(command)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             return f"Sorry, I encountered an error: {str(e)}"
 
+    async def _handle_media(self, command: str):
+        """Play a song or video on YouTube."""
+        if not any(word in command for word in ["play", "put on", "listen to", "youtube"]):
+            return None
+        song = command
+        for word in ["play", "put on", "listen to", "song", "music", "on youtube", "youtube"]:
+            song = song.replace(word, "")
+        song = song.strip()
+        if not song:
+            return "What would you like me to play?"
+        try:
+            if YOUTUBE_PLAYBACK_AVAILABLE:
+                await run_blocking(pywhatkit.playonyt, song)
+            else:
+                await run_blocking(webbrowser.open, f"https://www.youtube.com/results?search_query={song}")
+            return f"Playing {song} on YouTube"
+        except Exception:
+            return f"Sorry, I couldn't play {song}"
+
+    async def _handle_time_date(self, command: str):
+        """Tell the date when it is asked for, otherwise the time."""
+        asks_time, asks_date = TIME_QUESTION.search(command), DATE_QUESTION.search(command)
+        time_now = datetime.datetime.now().strftime('%I:%M %p')
+        if asks_date and asks_time:
+            return f"Today is {get_day_date()} and the time is {time_now}"
+        if asks_date:
+            return f"Today is {get_day_date()}"
+        return f"The current time is {time_now}" if asks_time else None
+
+    async def _handle_information(self, command: str):
+        """Answer a factual question from the knowledge pack, Wikipedia or DuckDuckGo."""
+        if "search" in command or "look up" in command:
+            query = command.replace("search for", "").replace("search", "").replace("look up", "").strip()
+            if not query:
+                return "What would you like me to search for?"
+            result = await duckduckgo_search_async(query)
+            if result:
+                return result[:200] + "..." if len(result) > 200 else result
+            await run_blocking(webbrowser.open, f"https://www.google.com/search?q={query}")
+            return f"I couldn't find a quick answer, so I opened a search for {query}"
+        phrases = ["tell me about", "who is", "who was", "what is", "what are", "explain"]
+        if not any(phrase in command for phrase in phrases):
+            return None
+        subject = command
+        for phrase in phrases:
+            subject = subject.replace(phrase, "").strip()
+        if not subject:
+            return "What would you like to know about?"
+        if knowledge_pack:
+            info = await run_blocking(knowledge_pack.lookup, subject)
+            if info:
+                return info
+        try:
+            return await run_blocking(wikipedia.summary, subject, sentences=2)
+        except wikipedia.exceptions.DisambiguationError:
+            return f"There are multiple results for {subject}. Can you be more specific?"
+        except wikipedia.exceptions.PageError:
+            return f"I couldn't find information about {subject}"
+
+    async def _handle_system_control(self, command: str):
+        """Open or close applications and adjust volume or brightness."""
+        if any(word in command for word in ["volume", "louder", "quieter"]):
+            return await self._handle_level(command, "volume", set_volume, (75, ["louder"]), (25, ["quieter"]))
+        if any(word in command for word in ["brightness", "brighter", "dim"]):
+            return await self._handle_level(command, "brightness", set_brightness, (80, ["brighter"]), (30, ["dim"]))
+        match = OPEN_PATTERN.search(command)
+        if match:
+            return await self._open_app_or_site(match.group(1).strip())
+        match = CLOSE_PATTERN.search(command)
+        if match:
+            app = match.group(1).strip()
+            return f"Closed {app}" if await run_blocking(close_application, app) else f"I couldn't find {app} to close"
+        return None
+
+    async def _handle_level(self, command: str, name: str, setter, raise_to: tuple, lower_to: tuple) -> str:
+        """Set, raise or lower the volume or brightness.
+
+        raise_to and lower_to pair the level to apply with extra words that ask for it.
+        """
+        (high, raise_words), (low, lower_words) = raise_to, lower_to
+        try:
+            if f"set {name}" in command or f"{name} to" in command:
+                for word in command.split():
+                    if word.isdigit():
+                        level = int(word)
+                        if 0 <= level <= 100:
+                            return f"{name.capitalize()} set to {level}%" if await run_blocking(
+                                setter, level) else f"I couldn't change the {name}"
+                        return f"{name.capitalize()} must be between 0 and 100"
+            elif any(word in command for word in [f"increase {name}", f"{name} up"] + raise_words):
+                return f"{name.capitalize()} increased" if await run_blocking(setter, high) else f"I couldn't increase the {name}"
+            elif any(word in command for word in [f"decrease {name}", f"decrease the {name}", f"{name} down"] + lower_words):
+                return f"{name.capitalize()} decreased" if await run_blocking(setter, low) else f"I couldn't decrease the {name}"
+            return f"Please specify a {name} level between 0 and 100"
+        except Exception:
+            return f"I couldn't change the {name}"
+
+    async def _open_app_or_site(self, app_or_site: str) -> str:
+        """Launch a known or indexed application, or open a website."""
+        if app_or_site in APP_PATHS:
+            try:
+                await run_blocking(subprocess.Popen, APP_PATHS[app_or_site])
+                return f"Opening {app_or_site}"
+            except Exception:
+                return f"I couldn't open {app_or_site}"
+        try:
+            if "." in app_or_site or any(
+                    site in app_or_site for site in ["google", "youtube", "facebook", "twitter"]):
+                if not app_or_site.startswith("http"):
+                    app_or_site = f"https://{app_or_site}" if "." in app_or_site else f"https://www.{app_or_site}.com"
+                await run_blocking(webbrowser.open, app_or_site)
+                return f"Opening {app_or_site} in browser"
+            await run_blocking(app_catalog.refresh)
+            command_line = app_catalog.lookup(app_or_site)
+            if command_line:
+                await run_blocking(launch_application, command_line)
+                return f"Opening {app_or_site}"
+            await run_blocking(webbrowser.open, f"https://www.google.com/search?q={app_or_site}")
+            return f"Searching for {app_or_site}"
+        except Exception:
+            return f"I couldn't open {app_or_site}"
+
+    async def _handle_weather(self, command: str):
+        """Open a weather search for the requested or current location."""
+        location = command.split(" in ")[-1].strip() if " in " in command else "current location"
+        await run_blocking(webbrowser.open, f"https://www.google.com/search?q=weather+{location}")
+        return f"Opening weather information for {location}"
+
     def stop(self):
-        """Stop the voice worker thread."""
+        """Stop the voice worker thread and cancel in-flight commands."""
         self._stop_event.set()
+        self._pause_event.set()
+        self.cancel_pending()
 
     def pause(self):
         """Pause voice recognition."""
@@ -574,6 +1650,8 @@ class VoiceScreen(QWidget):
         """Start the voice recognition worker."""
         if self.worker and self.worker.isRunning():
             return
+        if self.worker:
+            self.worker.deleteLater()
         self.worker = VoiceWorker()
         self.worker.transcribed.connect(self.on_transcribed)
         self.worker.response_ready.connect(self.on_response)
@@ -600,8 +1678,7 @@ class VoiceScreen(QWidget):
 
     def handle_stop(self):
         """Stop the voice recognition worker."""
-        global interrupt_flag
-        interrupt_flag.set()
+        interrupt_speech()
         if self.worker:
             self.worker.stop()
             self.worker.wait(3000)
@@ -618,6 +1695,7 @@ class VoiceScreen(QWidget):
         """Handle response from voice worker."""
         self.add_conversation_item(response, is_user=False)
         asyncio.run_coroutine_threadsafe(text_to_speech(response), loop)
+        record_memory_turn("voice")
 
     def on_status(self, status: str):
         """Handle status updates (currently unused)."""
@@ -631,6 +1709,7 @@ class VoiceScreen(QWidget):
 class ChatScreen(QWidget):
     """Widget for text-based chat mode."""
     back_to_menu = pyqtSignal()
+    response_ready = pyqtSignal(str)
 
     def __init__(self):
         super().__init__()
@@ -723,6 +1802,7 @@ class ChatScreen(QWidget):
         back_btn.clicked.connect(self.back_to_menu.emit)
         layout.addWidget(back_btn, alignment=Qt.AlignmentFlag.AlignCenter)
         self.chat_area.append("Welcome to Chat Mode! Type your questions below and I'll respond using AI.")
+        self.response_ready.connect(self.on_response)
 
     def send_message(self):
         """Send a text message and display the response."""
@@ -731,11 +1811,22 @@ class ChatScreen(QWidget):
             return
         self.chat_area.append(f"\nYou: {message}")
         self.input_field.clear()
-        response = ask_gemini(message)
+        local_answer = evaluate_locally(message.lower())
+        if local_answer:
+            self.on_response(local_answer)
+            return
+        future = asyncio.run_coroutine_threadsafe(ask_gemini_async(message), loop)
+        future.add_done_callback(
+            lambda f: self.response_ready.emit(f.result()) if not f.cancelled() else None
+        )
+
+    def on_response(self, response: str):
+        """Display a response from Echo."""
         self.chat_area.append(f"\nEcho: {response}")
         cursor = self.chat_area.textCursor()
         cursor.movePosition(cursor.MoveOperation.End)
         self.chat_area.setTextCursor(cursor)
+        record_memory_turn("chat")
 
 
 class WelcomeScreen(QWidget):
@@ -852,6 +1943,7 @@ class VoiceWindow(QMainWindow):
         self.welcome_screen.chat_mode_clicked.connect(self.show_chat_screen)
         self.voice_screen.back_to_menu.connect(self.show_welcome_screen)
         self.chat_screen.back_to_menu.connect(self.show_welcome_screen)
+        reminder_scheduler.fired.connect(self.on_reminder)
         self.stacked_widget.setCurrentWidget(self.welcome_screen)
 
     def center_on_screen(self):
@@ -874,8 +1966,15 @@ class VoiceWindow(QMainWindow):
         """Show the chat mode screen."""
         self.stacked_widget.setCurrentWidget(self.chat_screen)
 
+    def on_reminder(self, message: str):
+        """Announce a due timer or reminder in both modes."""
+        self.voice_screen.add_conversation_item(message, is_user=False)
+        self.chat_screen.chat_area.append(f"\nEcho: {message}")
+        asyncio.run_coroutine_threadsafe(text_to_speech(message), loop)
+
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
     window = VoiceWindow()
@@ -0,0 +1,139 @@
+"""Per-turn memory diagnostics for long-running Echo sessions.
+
+Enable by pointing ECHO_MEMORY_REPORT at a JSON file. After every turn the
+app hands over cheap counters it gathered on the GUI thread (widgets, live
+voice workers, threads, pending asyncio tasks); the tracemalloc snapshot,
+the diff against the previous turn and the report write all happen on a
+background thread so the interface never waits on them.
+
+Allocations made by tracemalloc and by this module are filtered out, so the
+report shows the app's memory rather than the profiler's. A metric is
+flagged as growing when the least-squares slope over the recent turns
+exceeds its tolerance, which a single garbage collection dip cannot hide.
+"""
+import collections
+import datetime
+import json
+import logging
+import os
+import queue
+import threading
+import tracemalloc
+
+TRACE_FRAMES = 1
+TOP_ALLOCATORS = 10
+HISTORY_TURNS = 500
+GROWTH_WINDOW = 20
+# Per-turn slope above which a metric counts as growing
+GROWTH_TOLERANCE = {"traced_bytes": 16 * 1024}
+DEFAULT_COUNT_TOLERANCE = 0.25
+
+logger = logging.getLogger("echo")
+
+
+def _slope(values: list) -> float:
+    """Return the least-squares slope of values against their index."""
+    n = len(values)
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    numerator = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    denominator = sum((x - mean_x) ** 2 for x in range(n))
+    return numerator / denominator if denominator else 0.0
+
+
+class MemoryDiagnostics:
+    """Collect per-turn memory statistics and keep a JSON report up to date."""
+
+    def __init__(self, report_path: str, frames: int = TRACE_FRAMES):
+        self.report_path = report_path
+        self.turns = collections.deque(maxlen=HISTORY_TURNS)
+        self._turn_number = 0
+        self._previous = None
+        self._filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ]
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._pending = queue.SimpleQueue()
+        threading.Thread(target=self._run, name="memory-diagnostics", daemon=True).start()
+
+    def record_turn(self, label: str, counts: dict):
+        """Queue a finished turn; counts maps metric names to object counts."""
+        self._pending.put((label, datetime.datetime.now().isoformat(timespec="seconds"), dict(counts)))
+
+    def _run(self):
+        while True:
+            label, recorded_at, counts = self._pending.get()
+            try:
+                self.snapshot_turn(label, recorded_at, counts)
+                self.write_report()
+            except Exception as e:
+                logger.warning("Memory diagnostics failed: %s", e)
+
+    def snapshot_turn(self, label: str, recorded_at: str, counts: dict):
+        """Snapshot traced memory and diff its top allocators against the last turn."""
+        snapshot = tracemalloc.take_snapshot().filter_traces(self._filters)
+        _, peak = tracemalloc.get_traced_memory()
+        top = []
+        if self._previous is not None:
+            for stat in snapshot.compare_to(self._previous, "lineno")[:TOP_ALLOCATORS]:
+                frame = stat.traceback[0]
+                top.append({
+                    "location": f"{frame.filename}:{frame.lineno}",
+                    "size_diff": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                    "size": stat.size,
+                })
+        self._previous = snapshot
+        self._turn_number += 1
+        self.turns.append({
+            "turn": self._turn_number,
+            "label": label,
+            "time": recorded_at,
+            # Sum of the filtered traces: excludes tracemalloc's own bookkeeping,
+            # the retained previous snapshot and this module's history
+            "traced_bytes": sum(stat.size for stat in snapshot.statistics("filename")),
+            "peak_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+            **counts,
+            "top_allocators": top,
+        })
+
+    def growth_warnings(self) -> list:
+        """Return metrics whose fitted per-turn growth exceeds their tolerance."""
+        window = list(self.turns)[-GROWTH_WINDOW:]
+        if len(window) < 3:
+            return []
+        metrics = ["traced_bytes"] + [
+            key for key, value in window[-1].items()
+            if isinstance(value, int) and key not in ("turn", "traced_bytes", "peak_bytes",
+                                                      "tracemalloc_overhead_bytes")
+        ]
+        warnings = []
+        for metric in metrics:
+            values = [turn.get(metric, 0) for turn in window]
+            per_turn = _slope(values)
+            if per_turn > GROWTH_TOLERANCE.get(metric, DEFAULT_COUNT_TOLERANCE):
+                warnings.append({
+                    "metric": metric,
+                    "first": values[0],
+                    "last": values[-1],
+                    "per_turn": round(per_turn, 2),
+                })
+        return warnings
+
+    def write_report(self):
+        """Replace the report file with the recorded turns and growth warnings."""
+        report = {"turns": list(self.turns), "growth": self.growth_warnings()}
+        partial = f"{self.report_path}.tmp"
+        try:
+            # json.dumps without indent runs the C encoder, whose allocations are
+            # attributed to this module and filtered out of later snapshots
+            with open(partial, "w", encoding="utf-8") as f:
+                f.write(json.dumps(report))
+            os.replace(partial, self.report_path)
+        except OSError as e:
+            logger.warning("Could not write memory report: %s", e)